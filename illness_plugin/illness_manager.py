@@ -6,18 +6,42 @@
 import time
 import random
 import logging
-from typing import Optional, Dict, Any, List
+from collections import deque
+from itertools import islice
+from typing import Optional, Dict, Any, List, Deque, Tuple
 from .illness_types import (
-    IllnessType, IllnessInfo, get_illness_description,
-    get_illness_duration, get_illness_severity, get_possible_transitions
+    IllnessType, IllnessInfo, ILLNESS_STAGES,
+    _draw_weighted_illnesses, _IDX_TO_TYPE, _TYPE_TO_IDX, _STAGE_TO_IDX,
+    _TRANSITION_CHOICES, _TRANSITION_WEIGHTS, _STAGE_INITIAL_HOURS, _STAGE_PROGRESSING_HOURS
 )
 
 logger = logging.getLogger(__name__)
 
+# 加权随机疾病预抽样池大小
+_ILLNESS_POOL_SIZE = 1024
+
+# 疾病历史记录保留条数
+_HISTORY_LIMIT = 20
+
+# 疾病历史记录按环形槽位逐条存储，每次康复只写入一条记录和一个计数索引
+_HISTORY_SLOT_KEY = "illness_history:{}"
+_HISTORY_INDEX_KEY = "illness_history_index"
+# 旧版整表存储的历史记录键，仅用于迁移读取
+_LEGACY_HISTORY_KEY = "illness_history"
+
+# 紧凑格式的状态存储键，布局：
+# [疾病类型索引(-1表示健康), 发病时间, 严重程度, 阶段索引, 上次康复时间, 冷却结束时间, 最后更新时间]
+_STATE_KEY = "illness_state_v2"
+# 旧版字典格式的状态存储键，仅用于迁移读取
+_LEGACY_STATE_KEY = "illness_state"
+
 
 class IllnessManager:
     """疾病管理器核心类"""
     
+    # 类级别的加权随机疾病预抽样池，所有实例共享
+    _illness_pool: List[IllnessType] = []
+    
     def __init__(self, storage):
         """
         初始化疾病管理器
@@ -29,26 +53,107 @@ class IllnessManager:
         self.current_illness: Optional[IllnessInfo] = None
         self.last_recovery_time: float = 0
         self.cool_down_end_time: float = 0
+        # 状态是否有未保存的改动（仅疾病阶段变化采用写回模式，由 flush 定期或退出时写入存储）
+        self._dirty: bool = False
+        # 最近一次写入存储的状态摘要，用于跳过无变化的写入
+        self._last_saved_key: Optional[tuple] = None
         
         # 从存储加载状态
         self.load_state()
+        
+        # 疾病历史记录在首次查询时才从存储读取，之后在内存中维护
+        self._history: Optional[Deque[Dict[str, Any]]] = None
+        # 已写入的历史记录总数，用于计算下一个环形槽位；首次写入或查询时只读取计数索引
+        self._history_count: Optional[int] = None
+    
+    def _get_history_count(self) -> int:
+        """获取已写入的历史记录总数，首次访问时从存储读取"""
+        if self._history_count is None:
+            self._history_count = self._load_history_count()
+        return self._history_count
+    
+    def _load_history_count(self) -> int:
+        """从本地存储读取历史记录计数索引，必要时迁移旧版历史记录"""
+        try:
+            index = self.storage.get(_HISTORY_INDEX_KEY, None)
+            if index is not None:
+                return index.get("count", 0)
+            
+            # 兼容旧版整表格式，一次性迁移到环形槽位，所有记录写完后只写一次索引
+            records = self.storage.get(_LEGACY_HISTORY_KEY, [])[-_HISTORY_LIMIT:]
+            for seq, record in enumerate(records):
+                self.storage.set(_HISTORY_SLOT_KEY.format(seq), record)
+            self.storage.set(_HISTORY_INDEX_KEY, {"count": len(records)})
+            return len(records)
+            
+        except Exception as e:
+            logger.error(f"加载疾病历史记录索引失败: {e}")
+            return 0
+    
+    def _get_history(self) -> Deque[Dict[str, Any]]:
+        """获取内存中的疾病历史记录，首次访问时从存储加载"""
+        if self._history is None:
+            self._history = self._load_history()
+        return self._history
+    
+    def _load_history(self) -> Deque[Dict[str, Any]]:
+        """从本地存储加载疾病历史记录"""
+        history: Deque[Dict[str, Any]] = deque(maxlen=_HISTORY_LIMIT)
+        try:
+            count = self._get_history_count()
+            for seq in range(max(0, count - _HISTORY_LIMIT), count):
+                record = self.storage.get(_HISTORY_SLOT_KEY.format(seq % _HISTORY_LIMIT), None)
+                if record:
+                    history.append(record)
+            
+        except Exception as e:
+            logger.error(f"加载疾病历史记录失败: {e}")
+        return history
+    
+    def _write_history_record(self, record: Dict[str, Any]):
+        """将一条历史记录写入下一个环形槽位并更新索引"""
+        # 只需要记录总数来确定槽位，不加载已有的历史记录
+        count = self._get_history_count()
+        self.storage.set(_HISTORY_SLOT_KEY.format(count % _HISTORY_LIMIT), record)
+        self._history_count = count + 1
+        self.storage.set(_HISTORY_INDEX_KEY, {"count": self._history_count})
+        # 内存中的历史记录已加载时同步追加，未加载时留待首次查询时读取
+        if self._history is not None:
+            self._history.append(record)
     
     def load_state(self):
         """从本地存储加载疾病状态"""
         try:
-            state_data = self.storage.get("illness_state", {})
+            packed = self.storage.get(_STATE_KEY, None)
             
-            if state_data.get("current_illness"):
-                illness_data = state_data["current_illness"]
-                self.current_illness = IllnessInfo(
-                    illness_type=IllnessType(illness_data["type"]),
-                    start_time=illness_data["start_time"],
-                    severity=illness_data.get("severity", 0.5),
-                    stage=illness_data.get("stage", "initial")
-                )
+            if packed:
+                type_idx, start_time, severity, stage_idx, last_recovery, cool_down_end, _ = packed
+                if type_idx >= 0:
+                    self.current_illness = IllnessInfo(
+                        illness_type=_IDX_TO_TYPE[type_idx],
+                        start_time=start_time,
+                        severity=severity,
+                        stage=ILLNESS_STAGES[stage_idx]
+                    )
+                self.last_recovery_time = last_recovery
+                self.cool_down_end_time = cool_down_end
+            else:
+                # 兼容旧版字典格式，下次保存时迁移到紧凑格式
+                state_data = self.storage.get(_LEGACY_STATE_KEY, {})
+                
+                if state_data.get("current_illness"):
+                    illness_data = state_data["current_illness"]
+                    self.current_illness = IllnessInfo(
+                        illness_type=IllnessType(illness_data["type"]),
+                        start_time=illness_data["start_time"],
+                        severity=illness_data.get("severity", 0.5),
+                        stage=illness_data.get("stage", "initial")
+                    )
+                
+                self.last_recovery_time = state_data.get("last_recovery_time", 0)
+                self.cool_down_end_time = state_data.get("cool_down_end_time", 0)
             
-            self.last_recovery_time = state_data.get("last_recovery_time", 0)
-            self.cool_down_end_time = state_data.get("cool_down_end_time", 0)
+            self._last_saved_key = self._state_key()
             
             logger.info(f"疾病状态已加载: {self.get_health_status()}")
             
@@ -58,25 +163,42 @@ class IllnessManager:
             self.last_recovery_time = 0
             self.cool_down_end_time = 0
     
-    def save_state(self):
-        """保存疾病状态到本地存储"""
+    def _state_key(self) -> tuple:
+        """获取需要持久化的状态摘要（不含 last_update）"""
+        illness = self.current_illness
+        return (
+            illness and (illness.illness_type, illness.start_time, illness.severity, illness.stage),
+            self.last_recovery_time,
+            self.cool_down_end_time,
+        )
+    
+    def save_state(self, now: Optional[float] = None):
+        """保存疾病状态到本地存储（状态无变化时跳过写入）"""
+        key = self._state_key()
+        if key == self._last_saved_key:
+            self._dirty = False
+            return
+        
         try:
-            state_data = {
-                "current_illness": None,
-                "last_recovery_time": self.last_recovery_time,
-                "cool_down_end_time": self.cool_down_end_time,
-                "last_update": time.time()
-            }
-            
-            if self.current_illness:
-                state_data["current_illness"] = {
-                    "type": self.current_illness.illness_type.value,
-                    "start_time": self.current_illness.start_time,
-                    "severity": self.current_illness.severity,
-                    "stage": self.current_illness.stage
-                }
+            illness = self.current_illness
+            if illness:
+                packed = [
+                    _TYPE_TO_IDX[illness.illness_type],
+                    illness.start_time,
+                    illness.severity,
+                    _STAGE_TO_IDX[illness.stage],
+                ]
+            else:
+                packed = [-1, 0, 0, 0]
+            packed += [
+                self.last_recovery_time,
+                self.cool_down_end_time,
+                time.time() if now is None else now,
+            ]
             
-            self.storage.set("illness_state", state_data)
+            self.storage.set(_STATE_KEY, packed)
+            self._dirty = False
+            self._last_saved_key = key
             logger.debug("疾病状态已保存")
             
         except Exception as e:
@@ -87,42 +209,48 @@ class IllnessManager:
         if not self.current_illness:
             return
         
-        current_time = time.time()
-        duration_hours = self.current_illness.get_duration_hours()
-        illness_type = self.current_illness.illness_type
-        expected_duration = get_illness_duration(illness_type)
+        now = time.time()
+        illness = self.current_illness
+        duration_hours = illness.get_duration_hours(now)
+        illness_type = illness.illness_type
+        expected_duration = illness.expected_duration
+        
+        # 快速路径：仍处于初期且未到进展阈值时，不会发生转换或阶段变化
+        if illness.stage == "initial" and duration_hours < _STAGE_INITIAL_HOURS[illness_type]:
+            return
         
-        logger.debug(f"当前疾病: {illness_type.value}, 持续时间: {duration_hours:.1f}小时, 预期: {expected_duration}小时")
+        logger.debug("当前疾病: %s, 持续时间: %.1f小时, 预期: %s小时",
+                     illness_type, duration_hours, expected_duration)
         
         # 检查是否应该转换到下一个疾病阶段
         if duration_hours >= expected_duration:
-            possible_transitions = get_possible_transitions(illness_type)
+            # 一次抽取同时决定是否转换以及转换目标，None 表示直接康复
+            new_illness_type = random.choices(
+                _TRANSITION_CHOICES[illness_type], _TRANSITION_WEIGHTS[illness_type], k=1
+            )[0]
             
-            if possible_transitions:
-                # 有转换可能，随机决定是否转换
-                if random.random() < 0.7:  # 70%概率转换
-                    new_illness_type = random.choice(possible_transitions)
-                    self.transition_to_illness(new_illness_type)
-                else:
-                    # 直接康复
-                    self.recover_from_illness()
+            if new_illness_type is None:
+                self.recover_from_illness(now)
             else:
-                # 没有转换可能，直接康复
-                self.recover_from_illness()
+                self.transition_to_illness(new_illness_type, now)
         
         # 更新疾病阶段
-        self._update_illness_stage(duration_hours, expected_duration)
+        self._update_illness_stage(duration_hours)
     
-    def _update_illness_stage(self, duration_hours: float, expected_duration: float):
+    def flush(self):
+        """如有未保存的改动，则一次性写入存储"""
+        if self._dirty:
+            self.save_state()
+    
+    def _update_illness_stage(self, duration_hours: float):
         """更新疾病阶段"""
         if not self.current_illness:
             return
         
-        progress = duration_hours / expected_duration if expected_duration > 0 else 0
-        
-        if progress < 0.3:
+        illness_type = self.current_illness.illness_type
+        if duration_hours < _STAGE_INITIAL_HOURS[illness_type]:
             new_stage = "initial"
-        elif progress < 0.7:
+        elif duration_hours < _STAGE_PROGRESSING_HOURS[illness_type]:
             new_stage = "progressing"
         else:
             new_stage = "recovering"
@@ -130,44 +258,44 @@ class IllnessManager:
         if self.current_illness.stage != new_stage:
             self.current_illness.stage = new_stage
             logger.info(f"疾病阶段更新: {new_stage}")
-            self.save_state()
+            self._dirty = True
     
-    def transition_to_illness(self, new_illness_type: IllnessType):
+    def transition_to_illness(self, new_illness_type: IllnessType, now: Optional[float] = None):
         """转换到新的疾病"""
-        old_illness = self.current_illness.illness_type.value if self.current_illness else "无"
-        new_illness = new_illness_type.value
+        if now is None:
+            now = time.time()
+        old_illness = self.current_illness.illness_type if self.current_illness else "无"
         
         self.current_illness = IllnessInfo(
             illness_type=new_illness_type,
-            start_time=time.time(),
-            severity=get_illness_severity(new_illness_type),
+            start_time=now,
+            severity=new_illness_type.severity,
             stage="initial"
         )
         
-        logger.info(f"疾病转换: {old_illness} -> {new_illness}")
-        self.save_state()
+        logger.info(f"疾病转换: {old_illness} -> {new_illness_type}")
+        self.save_state(now)
     
-    def recover_from_illness(self):
+    def recover_from_illness(self, now: Optional[float] = None):
         """从疾病中康复"""
         if self.current_illness:
-            illness_type = self.current_illness.illness_type.value
-            duration = self.current_illness.get_duration_hours()
+            if now is None:
+                now = time.time()
+            illness_type = self.current_illness.illness_type
+            duration = self.current_illness.get_duration_hours(now)
             
             logger.info(f"疾病康复: {illness_type}, 持续时间: {duration:.1f}小时")
             
             # 保存到历史记录
-            self._add_to_history(self.current_illness, time.time())
+            self._add_to_history(self.current_illness, now)
             
             self.current_illness = None
-            self.last_recovery_time = time.time()
-            
-            self.save_state()
+            self.last_recovery_time = now
+            self.save_state(now)
     
     def _add_to_history(self, illness: IllnessInfo, end_time: float):
         """添加疾病到历史记录"""
         try:
-            history = self.storage.get("illness_history", [])
-            
             history_record = {
                 "type": illness.illness_type.value,
                 "start_time": illness.start_time,
@@ -176,13 +304,7 @@ class IllnessManager:
                 "severity": illness.severity
             }
             
-            history.append(history_record)
-            
-            # 只保留最近20条记录
-            if len(history) > 20:
-                history = history[-20:]
-            
-            self.storage.set("illness_history", history)
+            self._write_history_record(history_record)
             
         except Exception as e:
             logger.error(f"添加疾病历史记录失败: {e}")
@@ -193,8 +315,7 @@ class IllnessManager:
         
         # 检查冷却期
         if current_time < self.cool_down_end_time:
-            remaining_hours = (self.cool_down_end_time - current_time) / 3600
-            logger.debug(f"冷却期中，剩余时间: {remaining_hours:.1f}小时")
+            logger.debug("冷却期中，剩余时间: %.1f小时", (self.cool_down_end_time - current_time) / 3600)
             return False
         
         # 检查当前是否已生病
@@ -213,16 +334,17 @@ class IllnessManager:
         try:
             # 获取随机疾病类型
             illness_type = self._get_weighted_random_illness()
+            now = time.time()
             
             self.current_illness = IllnessInfo(
                 illness_type=illness_type,
-                start_time=time.time(),
-                severity=get_illness_severity(illness_type),
+                start_time=now,
+                severity=illness_type.severity,
                 stage="initial"
             )
             
-            logger.info(f"触发新疾病: {illness_type.value}")
-            self.save_state()
+            logger.info(f"触发新疾病: {illness_type}")
+            self.save_state(now)
             
             return self.current_illness
             
@@ -232,94 +354,82 @@ class IllnessManager:
     
     def _get_weighted_random_illness(self) -> IllnessType:
         """获取加权随机疾病类型（轻微疾病概率更高）"""
-        # 定义疾病权重（数值越大，概率越高）
-        weights = {
-            IllnessType.MILD_COLD: 30,           # 轻感冒 - 最常见
-            IllnessType.HEADACHE: 20,            # 轻微头痛
-            IllnessType.STIFF_NECK: 15,          # 落枕
-            IllnessType.MINOR_SCRATCH: 15,       # 轻微擦伤
-            IllnessType.NOSEBLEED: 10,           # 鼻血
-            IllnessType.MOUTH_ULCER: 15,         # 口腔溃疡
-            IllnessType.GASTROENTERITIS: 10,     # 肠胃炎
-            IllnessType.SKIN_ALLERGY: 10,        # 皮肤过敏
-            IllnessType.TONSILLITIS: 8,          # 扁桃体炎
-            IllnessType.ANKLE_SPRAIN: 5,         # 脚踝扭伤
-            IllnessType.SEVERE_COLD: 3,          # 重感冒 - 较少见
-        }
-        
-        illness_types = []
-        illness_weights = []
-        
-        for illness_type, weight in weights.items():
-            illness_types.append(illness_type)
-            illness_weights.append(weight)
-        
-        return random.choices(illness_types, weights=illness_weights, k=1)[0]
+        pool = IllnessManager._illness_pool
+        if not pool:
+            # 池空时批量补充，摊薄每次抽取的开销
+            pool.extend(_draw_weighted_illnesses(_ILLNESS_POOL_SIZE))
+        return pool.pop()
     
     def force_recovery(self):
         """强制康复"""
         if self.current_illness:
-            logger.info(f"强制康复: {self.current_illness.illness_type.value}")
+            logger.info(f"强制康复: {self.current_illness.illness_type}")
             self.recover_from_illness()
     
     def set_cool_down(self, cool_down_days: float):
         """设置冷却期"""
-        self.cool_down_end_time = time.time() + (cool_down_days * 24 * 3600)
+        now = time.time()
+        self.cool_down_end_time = now + (cool_down_days * 24 * 3600)
         logger.info(f"设置冷却期: {cool_down_days}天")
-        self.save_state()
+        self.save_state(now)
     
     def get_health_status(self) -> Dict[str, Any]:
         """获取健康状态"""
         current_time = time.time()
+        in_cool_down = current_time < self.cool_down_end_time
+        cool_down_remaining = (self.cool_down_end_time - current_time) / 3600 if in_cool_down else 0
+        illness = self.current_illness
         
-        status = {
-            "is_healthy": self.current_illness is None,
-            "in_cool_down": current_time < self.cool_down_end_time,
-            "current_illness": None,
-            "cool_down_remaining": 0,
-            "last_recovery_time": self.last_recovery_time
-        }
+        if illness is None:
+            return {
+                "is_healthy": True,
+                "in_cool_down": in_cool_down,
+                "current_illness": None,
+                "cool_down_remaining": cool_down_remaining,
+                "last_recovery_time": self.last_recovery_time
+            }
         
-        if status["in_cool_down"]:
-            status["cool_down_remaining"] = (self.cool_down_end_time - current_time) / 3600
+        illness_type = illness.illness_type
+        duration_hours = illness.get_duration_hours(current_time)
+        remaining_hours = max(0, illness.expected_duration - duration_hours)
+        if remaining_hours > 24:
+            recovery_time_text = f"预计还有{remaining_hours / 24:.1f}天康复"
+        else:
+            recovery_time_text = f"预计还有{remaining_hours:.1f}小时康复"
         
-        if self.current_illness:
-            illness = self.current_illness
-            duration_hours = illness.get_duration_hours()
-            expected_duration = get_illness_duration(illness.illness_type)
-            remaining_hours = max(0, expected_duration - duration_hours)
-            
-            status["current_illness"] = {
-                "type": illness.illness_type.value,
-                "description": get_illness_description(illness.illness_type),
+        return {
+            "is_healthy": False,
+            "in_cool_down": in_cool_down,
+            "current_illness": {
+                "type": illness_type.value,
+                "description": illness_type.description,
                 "start_time": illness.start_time,
                 "duration_hours": duration_hours,
                 "remaining_hours": remaining_hours,
                 "severity": illness.severity,
                 "stage": illness.stage
-            }
-            
-            if remaining_hours > 24:
-                days = remaining_hours / 24
-                status["recovery_remaining_hours"] = remaining_hours
-                status["recovery_time_text"] = f"预计还有{days:.1f}天康复"
-            else:
-                status["recovery_remaining_hours"] = remaining_hours
-                status["recovery_time_text"] = f"预计还有{remaining_hours:.1f}小时康复"
-        
-        return status
+            },
+            "cool_down_remaining": cool_down_remaining,
+            "last_recovery_time": self.last_recovery_time,
+            "recovery_remaining_hours": remaining_hours,
+            "recovery_time_text": recovery_time_text
+        }
     
     def get_current_illness_description(self) -> Optional[str]:
         """获取当前疾病描述"""
         if self.current_illness:
-            return get_illness_description(self.current_illness.illness_type)
+            return self.current_illness.illness_type.description
         return None
     
+    def snapshot(self) -> Tuple[Optional[str], Optional[str]]:
+        """一次性获取当前疾病名称和描述，健康时返回 (None, None)"""
+        illness = self.current_illness
+        if illness is None:
+            return None, None
+        return illness.illness_type.value, illness.illness_type.description
+    
     def get_illness_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """获取疾病历史记录"""
-        try:
-            history = self.storage.get("illness_history", [])
-            return history[-limit:] if history else []
-        except Exception as e:
-            logger.error(f"获取疾病历史记录失败: {e}")
-            return []
\ No newline at end of file
+        records = list(islice(reversed(self._get_history()), limit))
+        records.reverse()
+        return records
\ No newline at end of file
@@ -4,13 +4,14 @@
 """
 
 from enum import Enum
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import random
 import time
 
 
-class IllnessType(Enum):
-    """疾病类型枚举"""
+class IllnessType(str, Enum):
+    """疾病类型枚举（成员本身即为疾病名称字符串）"""
     SEVERE_COLD = "重感冒"
     MILD_COLD = "轻感冒"
     TONSILLITIS = "扁桃体炎/咽炎"
@@ -22,19 +23,33 @@ class IllnessType(Enum):
     ANKLE_SPRAIN = "脚踝扭伤"
     NOSEBLEED = "鼻血"
     MOUTH_ULCER = "口腔溃疡"
+    
+    def __str__(self) -> str:
+        return self.value
+
+
+# 所有疾病类型（按定义顺序）
+_ALL_TYPES = tuple(IllnessType)
 
 
-@dataclass
+@dataclass(slots=True)
 class IllnessInfo:
     """疾病信息数据结构"""
     illness_type: IllnessType
     start_time: float
     severity: float = 0.5  # 严重程度 0-1
     stage: str = "initial"  # 阶段: initial, progressing, recovering
+    expected_duration: float = field(init=False, repr=False)  # 预期持续时间（小时），由疾病类型决定
     
-    def get_duration_hours(self) -> float:
-        """获取已持续时间（小时）"""
-        return (time.time() - self.start_time) / 3600
+    def __post_init__(self):
+        """根据疾病类型填充预期持续时间"""
+        self.expected_duration = self.illness_type.duration
+    
+    def get_duration_hours(self, now: Optional[float] = None) -> float:
+        """获取已持续时间（小时），可传入当前时间戳以复用同一时刻"""
+        if now is None:
+            now = time.time()
+        return (now - self.start_time) / 3600
 
 
 # 疾病症状描述映射
@@ -101,41 +116,132 @@ ILLNESS_SEVERITY = {
 }
 
 
+# 将描述、持续时间、严重程度和转换规则预先绑定到枚举成员上，查询时直接读取属性
+for _illness_type in IllnessType:
+    _illness_type.description = ILLNESS_DESCRIPTIONS.get(_illness_type, "身体不适，需要休息。")
+    _illness_type.duration = ILLNESS_DURATION_HOURS.get(_illness_type, 24)
+    _illness_type.severity = ILLNESS_SEVERITY.get(_illness_type, 0.5)
+    _illness_type.transitions = ILLNESS_TRANSITIONS.get(_illness_type, [])
+del _illness_type
+
+
+# 疾病阶段阈值（小时）：已持续时间低于前者为初期，低于后者为进展期，否则为恢复期
+_STAGE_INITIAL_HOURS = {t: t.duration * 0.3 for t in IllnessType}
+_STAGE_PROGRESSING_HOURS = {t: t.duration * 0.7 for t in IllnessType}
+
+
+# 疾病到期时的结局：70%概率在可转换疾病中等概率转换，其余康复（None 表示康复）
+_TRANSITION_PROBABILITY = 0.7
+_TRANSITION_CHOICES: Dict[IllnessType, List[Optional[IllnessType]]] = {}
+_TRANSITION_WEIGHTS: Dict[IllnessType, List[float]] = {}
+for _illness_type, _targets in ILLNESS_TRANSITIONS.items():
+    if _targets:
+        _TRANSITION_CHOICES[_illness_type] = list(_targets) + [None]
+        _TRANSITION_WEIGHTS[_illness_type] = (
+            [_TRANSITION_PROBABILITY / len(_targets)] * len(_targets) + [1 - _TRANSITION_PROBABILITY]
+        )
+    else:
+        _TRANSITION_CHOICES[_illness_type] = [None]
+        _TRANSITION_WEIGHTS[_illness_type] = [1.0]
+del _illness_type, _targets
+
+
+# 随机生病时的疾病权重（数值越大，概率越高），模块加载时拆分为类型和权重两个元组
+_ILLNESS_WEIGHTS = (
+    (IllnessType.MILD_COLD, 30),        # 轻感冒 - 最常见
+    (IllnessType.HEADACHE, 20),         # 轻微头痛
+    (IllnessType.STIFF_NECK, 15),       # 落枕
+    (IllnessType.MINOR_SCRATCH, 15),    # 轻微擦伤
+    (IllnessType.NOSEBLEED, 10),        # 鼻血
+    (IllnessType.MOUTH_ULCER, 15),      # 口腔溃疡
+    (IllnessType.GASTROENTERITIS, 10),  # 肠胃炎
+    (IllnessType.SKIN_ALLERGY, 10),     # 皮肤过敏
+    (IllnessType.TONSILLITIS, 8),       # 扁桃体炎
+    (IllnessType.ANKLE_SPRAIN, 5),      # 脚踝扭伤
+    (IllnessType.SEVERE_COLD, 3),       # 重感冒 - 较少见
+)
+_ILLNESS_WEIGHT_TYPES, _ILLNESS_WEIGHT_VALUES = zip(*_ILLNESS_WEIGHTS)
+
+
+def _build_alias(weights) -> Tuple[List[float], List[int]]:
+    """构建Walker别名表，使加权采样为O(1)"""
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+    
+    # 剩余项（含浮点误差残留）保持初始概率1，即总是选中自身
+    return prob, alias
+
+
+_ALIAS_PROB, _ALIAS_IDX = _build_alias(_ILLNESS_WEIGHT_VALUES)
+
+
+def _draw_weighted_illnesses(k: int) -> List[IllnessType]:
+    """按权重批量抽取k个疾病类型（别名法）"""
+    n = len(_ALIAS_PROB)
+    prob, alias, types = _ALIAS_PROB, _ALIAS_IDX, _ILLNESS_WEIGHT_TYPES
+    rand = random.random
+    result = []
+    for _ in range(k):
+        u = rand() * n
+        i = int(u)
+        result.append(types[i if (u - i) < prob[i] else alias[i]])
+    return result
+
+
+# 状态紧凑序列化用的索引映射（只允许在末尾追加，否则已保存的索引会错位）
+ILLNESS_STAGES = ("initial", "progressing", "recovering")
+_IDX_TO_TYPE = _ALL_TYPES
+_TYPE_TO_IDX = {t: i for i, t in enumerate(_IDX_TO_TYPE)}
+_STAGE_TO_IDX = {s: i for i, s in enumerate(ILLNESS_STAGES)}
+
+
 def get_illness_description(illness_type: IllnessType) -> str:
     """获取疾病症状描述"""
-    return ILLNESS_DESCRIPTIONS.get(illness_type, "身体不适，需要休息。")
+    return illness_type.description
 
 
 def get_illness_duration(illness_type: IllnessType) -> float:
     """获取疾病持续时间（小时）"""
-    return ILLNESS_DURATION_HOURS.get(illness_type, 24)
+    return illness_type.duration
 
 
 def get_illness_severity(illness_type: IllnessType) -> float:
     """获取疾病严重程度"""
-    return ILLNESS_SEVERITY.get(illness_type, 0.5)
+    return illness_type.severity
 
 
 def get_possible_transitions(illness_type: IllnessType) -> List[IllnessType]:
     """获取可能的疾病转换"""
-    return ILLNESS_TRANSITIONS.get(illness_type, [])
+    return illness_type.transitions
 
 
 def get_all_illness_types() -> List[IllnessType]:
     """获取所有疾病类型"""
-    return list(IllnessType)
+    return list(_ALL_TYPES)
 
 
 def get_random_illness_type(exclude_types: Optional[List[IllnessType]] = None) -> IllnessType:
     """获取随机疾病类型（可排除指定类型）"""
-    available_types = get_all_illness_types()
-    
-    if exclude_types:
-        available_types = [t for t in available_types if t not in exclude_types]
-    
-    if not available_types:
-        # 如果没有可用类型，返回轻感冒作为默认
-        return IllnessType.MILD_COLD
+    if not exclude_types:
+        return _ALL_TYPES[random.randrange(len(_ALL_TYPES))]
     
-    import random
-    return random.choice(available_types)
\ No newline at end of file
+    # 如果没有可用类型，返回轻感冒作为默认
+    available_types = tuple(t for t in _ALL_TYPES if t not in exclude_types) or (IllnessType.MILD_COLD,)
+    return available_types[random.randrange(len(available_types))]
\ No newline at end of file
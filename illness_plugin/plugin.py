@@ -3,24 +3,205 @@
 包含插件主类、Prompt组件、事件处理器和命令组件
 """
 
+import asyncio
+import atexit
+import functools
+import logging
+import re
 import time
+from dataclasses import dataclass
+from types import MappingProxyType
 from typing import List, Tuple, Type, Optional
 from src.plugin_system import (
     BasePlugin, register_plugin, ComponentInfo, ConfigField,
     BasePrompt, PlusCommand, CommandArgs, ChatType,
     BaseEventHandler, EventType
 )
-from src.plugin_system.base.component_types import InjectionRule, InjectionType
 from src.plugin_system.base.base_event import HandlerResult
-from src.chat.utils.prompt_params import PromptParameters
 from src.plugin_system.apis import storage_api, get_logger
-from src.chat.utils.prompt_params import PromptParameters
 from .illness_manager import IllnessManager
 
 logger = get_logger("illness_plugin")
 
-# 获取插件的本地存储实例
-plugin_storage = storage_api.get_local_storage("illness_plugin")
+# 疾病状态写回存储的间隔（秒）
+STATE_FLUSH_INTERVAL = 60
+
+
+# ==================== 插件配置 ====================
+
+@dataclass(slots=True)
+class _PluginConfig:
+    """插件配置快照，加载插件时一次性读取，由各组件共享；默认值与 config_schema 一致"""
+    enable_plugin: bool = True
+    daily_probability: float = 0.05
+    # 事件处理器两次检查疾病状态之间的最短间隔（秒）
+    check_interval_seconds: float = 60.0
+    cool_down_days: float = 3.0
+    kfc_enabled: bool = True
+    # 已规范化为 unified 或 split
+    kfc_mode: str = "unified"
+    enable_health_check: bool = True
+    enable_force_recovery: bool = True
+    enable_force_sick: bool = True
+
+
+# ==================== 聊天模式识别 ====================
+
+# 已知注入点对应的聊天模式：kfc（私聊/心流）、afc（群聊）、normal（普通）
+_MODE_BY_INJECTION = MappingProxyType({
+    "kfc_main": "kfc",
+    "kfc_replyer": "kfc",
+    "afc_main": "afc",
+    "afc_replyer": "afc",
+    "normal_style_prompt": "afc",
+    "s4u_style_prompt": "normal",
+})
+
+# 根据目标Prompt名称识别KFC（私聊/心流）和AFC（群聊）模式
+_KFC_RE = re.compile(r"kfc|kokoro|flow|chatter|私聊|心流", re.IGNORECASE)
+_AFC_RE = re.compile(r"afc|group|群聊|normal", re.IGNORECASE)
+
+
+def _detect_chat_mode(target_prompt: Optional[str]) -> str:
+    """根据目标Prompt名称获取聊天模式"""
+    if not target_prompt:
+        return "normal"
+    
+    mode = _MODE_BY_INJECTION.get(target_prompt)
+    if mode is None:
+        mode = _guess_chat_mode(target_prompt)
+    return mode
+
+
+@functools.lru_cache(maxsize=32)
+def _guess_chat_mode(target_prompt: str) -> str:
+    """按名称关键字识别未知目标Prompt的聊天模式，结果按名称缓存，避免重复识别和记录"""
+    if _KFC_RE.search(target_prompt):
+        mode = "kfc"
+    elif _AFC_RE.search(target_prompt):
+        mode = "afc"
+    else:
+        mode = "normal"
+    logger.info("[IllnessPrompt] 未知的目标Prompt: %s，按名称识别为%s模式", target_prompt, mode)
+    return mode
+
+
+# ==================== 提示词语气映射 ====================
+
+# 普通模式：简化的状态描述
+_NORMAL_TONES = MappingProxyType({
+    "重感冒": "声音沙哑，略显疲惫",
+    "轻感冒": "鼻音略重，偶尔打喷嚏",
+    "扁桃体炎/咽炎": "喉咙不适，说话较轻",
+    "肠胃不适(腹泻)": "精神欠佳，略显虚弱",
+    "皮肤过敏/皮疹": "有些不适，略显烦躁",
+    "轻微擦伤": "行动稍有不便",
+    "轻微头痛": "思维略慢，声音轻柔",
+    "落枕": "颈部不适，活动受限",
+    "脚踝扭伤": "行动不便，需要休息",
+    "鼻血": "刚止血，说话小心",
+    "口腔溃疡": "说话略有不便",
+})
+_DEFAULT_NORMAL_TONE = "身体欠佳，略显疲惫"
+
+# KFC模式：超简化状态提示
+_KFC_TONES = MappingProxyType({
+    "重感冒": "重感冒，略疲惫",
+    "轻感冒": "轻感冒，鼻塞",
+    "扁桃体炎/咽炎": "喉咙不适",
+    "肠胃不适(腹泻)": "肠胃不适",
+    "皮肤过敏/皮疹": "皮肤过敏",
+    "轻微擦伤": "小擦伤",
+    "轻微头痛": "轻微头痛",
+    "落枕": "落枕",
+    "脚踝扭伤": "脚踝扭伤",
+    "鼻血": "刚流鼻血",
+    "口腔溃疡": "口腔溃疡",
+})
+_DEFAULT_KFC_TONE = "身体欠佳"
+
+# AFC模式：简洁的状态描述
+_AFC_TONES = MappingProxyType({
+    "重感冒": "重感冒，略显疲惫",
+    "轻感冒": "轻感冒，鼻音略重",
+    "扁桃体炎/咽炎": "咽喉不适",
+    "肠胃不适(腹泻)": "肠胃不适，精神欠佳",
+    "皮肤过敏/皮疹": "皮肤过敏，略显烦躁",
+    "轻微擦伤": "轻微擦伤",
+    "轻微头痛": "轻微头痛",
+    "落枕": "落枕，活动受限",
+    "脚踝扭伤": "脚踝扭伤",
+    "鼻血": "刚止鼻血",
+    "口腔溃疡": "口腔溃疡",
+})
+_DEFAULT_AFC_TONE = "身体欠佳"
+
+
+# ==================== 提示词模板 ====================
+# 极简提示词，强调保持正常交流；模板在模块加载时预先去除首尾空白
+
+_NORMAL_TEMPLATE = """
+[当前状态：{illness} - {tone}]
+重要：保持正常交流和回复质量，仅在自然的情况下适当体现身体不适感。不影响核心功能和人格。
+""".strip()
+
+_KFC_UNIFIED_TEMPLATE = "[状态：{tone}] 重要：保持正常交流能力，仅在自然时体现不适。"
+
+_KFC_SPLIT_TEMPLATE = """
+【当前状态】{tone}
+【重要】保持正常交流，可适当体现不适
+""".strip()
+
+_AFC_TEMPLATE = """
+[当前状态：{tone}]
+重要：保持正常交流和功能，仅在适当时自然体现身体不适。
+""".strip()
+
+
+# ==================== 提示词渲染 ====================
+
+def _render_normal(illness_type_value: str, illness_desc: str) -> str:
+    """生成普通模式提示词 - 轻量化版本"""
+    return _NORMAL_TEMPLATE.format_map({
+        "illness": illness_type_value,
+        "tone": _NORMAL_TONES.get(illness_type_value, _DEFAULT_NORMAL_TONE),
+    })
+
+
+def _render_kfc_unified(illness_type_value: str, illness_desc: str) -> str:
+    """生成KFC统一模式提示词 - 轻量化版本"""
+    return _KFC_UNIFIED_TEMPLATE.format_map({
+        "tone": _KFC_TONES.get(illness_type_value, _DEFAULT_KFC_TONE),
+    })
+
+
+def _render_kfc_split(illness_type_value: str, illness_desc: str) -> str:
+    """生成KFC分离模式提示词 - 轻量化版本"""
+    return _KFC_SPLIT_TEMPLATE.format_map({
+        "tone": _KFC_TONES.get(illness_type_value, _DEFAULT_KFC_TONE),
+    })
+
+
+def _render_afc(illness_type_value: str, illness_desc: str) -> str:
+    """生成AFC模式提示词 - 轻量化版本"""
+    return _AFC_TEMPLATE.format_map({
+        "tone": _AFC_TONES.get(illness_type_value, _DEFAULT_AFC_TONE),
+    })
+
+
+# (聊天模式, KFC工作模式) -> 提示词渲染函数
+_RENDERERS = {
+    ("normal", None): _render_normal,
+    ("afc", None): _render_afc,
+    ("kfc", "unified"): _render_kfc_unified,
+    ("kfc", "split"): _render_kfc_split,
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _render(mode: str, kfc_sub_mode: Optional[str], illness_type_value: str, illness_desc: str) -> str:
+    """渲染提示词；结果只取决于参数，疾病期间重复调用直接命中缓存"""
+    return _RENDERERS[(mode, kfc_sub_mode)](illness_type_value, illness_desc)
 
 
 # ==================== Prompt组件 ====================
@@ -33,143 +214,62 @@ class IllnessPrompt(BasePrompt):
     
     injection_point = ["s4u_style_prompt", "normal_style_prompt", "kfc_main", "kfc_replyer", "afc_main", "afc_replyer"]
     
+    # 类级别的疾病管理器引用，与插件和命令共享同一实例
+    _illness_manager = None
+    # 类级别的插件配置快照，由插件加载配置后设置
+    _config = _PluginConfig()
+    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.illness_manager = IllnessManager(plugin_storage)
+        self.refresh_config()
+    
+    @classmethod
+    def set_illness_manager(cls, manager: IllnessManager):
+        cls._illness_manager = manager
+    
+    @classmethod
+    def set_config(cls, config: _PluginConfig):
+        cls._config = config
+    
+    def refresh_config(self):
+        """从共享的配置快照缓存提示词生成用到的配置，快照更新后可再次调用"""
+        config = self.__class__._config
+        self._kfc_enabled = config.kfc_enabled
+        self._kfc_mode = config.kfc_mode
     
     async def execute(self) -> str:
         """生成提示词 - 增强KFC/AFC模式支持"""
-        verbose = self.get_config("verbose_logging", False)
         target_prompt = getattr(self, 'target_prompt_name', None)
-        logger.info(f"[IllnessPrompt] 执行提示词生成，目标Prompt: {target_prompt}, verbose={verbose}")
-        if verbose:
-            logger.debug(f"[IllnessPrompt] 执行提示词生成，目标Prompt: {target_prompt}")
+        logger.info("[IllnessPrompt] 执行提示词生成，目标Prompt: %s", target_prompt)
         
-        if not self.illness_manager:
+        illness_manager = self.__class__._illness_manager
+        if not illness_manager:
             logger.info("[IllnessPrompt] 疾病管理器未设置，跳过")
-            if verbose:
-                logger.debug("[IllnessPrompt] 疾病管理器未设置，跳过")
             return ""
         
-        illness_desc = self.illness_manager.get_current_illness_description()
+        # 一次读取疾病名称和描述，避免两次读取之间状态被事件处理器修改
+        illness_type_value, illness_desc = illness_manager.snapshot()
         
         if not illness_desc:
             logger.info("[IllnessPrompt] 无疾病描述，跳过")
-            if verbose:
-                logger.debug("[IllnessPrompt] 无疾病描述，跳过")
             return ""
         
-        # 根据疾病类型调整语气
-        illness_type = self.illness_manager.current_illness.illness_type
+        # 检测当前聊天模式（未启用KFC集成时按普通模式处理）
+        mode = _detect_chat_mode(target_prompt)
+        if mode == "kfc" and not self._kfc_enabled:
+            mode = "normal"
         
-        # 获取配置
-        kfc_enabled = self.get_config("kfc_integration.enabled", True)
-        kfc_mode = self.get_config("kfc_integration.mode", "unified")
-        
-        # 检测当前聊天模式
-        is_kfc_mode = False
-        is_afc_mode = False
-        
-        if target_prompt:
-            target_name = target_prompt.lower()
-            if any(kfc_key in target_name for kfc_key in ['kfc', 'kokoro', 'flow', 'chatter', '私聊', '心流']):
-                is_kfc_mode = True
-            elif any(afc_key in target_name for afc_key in ['afc', 'group', '群聊', 'normal']):
-                is_afc_mode = True
-        
-        if verbose:
-            logger.debug(f"[IllnessPrompt] 疾病描述: {illness_desc}, 类型: {illness_type.value}, KFC模式: {is_kfc_mode}, AFC模式: {is_afc_mode}")
+        logger.debug("[IllnessPrompt] 疾病描述: %s, 类型: %s, 聊天模式: %s",
+                     illness_desc, illness_type_value, mode)
         
         # 根据聊天模式生成不同的提示词
-        if kfc_enabled and is_kfc_mode:
-            prompt = self._generate_kfc_prompt(illness_type, illness_desc, kfc_mode)
-        elif is_afc_mode:
-            prompt = self._generate_afc_prompt(illness_type, illness_desc)
-        else:
-            prompt = self._generate_normal_prompt(illness_type, illness_desc)
+        prompt = _render(mode, self._kfc_mode if mode == "kfc" else None, illness_type_value, illness_desc)
         
-        if verbose:
-            logger.debug(f"[IllnessPrompt] 生成的提示词: {prompt[:100]}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[IllnessPrompt] 生成的提示词: %s...", prompt[:100])
         
-        logger.info(f"[IllnessPrompt] 疾病提示词已生成（疾病: {illness_type.value}, 目标: {target_prompt}）")
+        logger.info("[IllnessPrompt] 疾病提示词已生成（疾病: %s, 目标: %s）", illness_type_value, target_prompt)
         return prompt
-    
-    def _generate_normal_prompt(self, illness_type, illness_desc: str) -> str:
-        """生成普通模式提示词 - 轻量化版本"""
-        # 简化的状态描述
-        state_hints = {
-            "重感冒": "声音沙哑，略显疲惫",
-            "轻感冒": "鼻音略重，偶尔打喷嚏",
-            "扁桃体炎/咽炎": "喉咙不适，说话较轻",
-            "肠胃不适(腹泻)": "精神欠佳，略显虚弱",
-            "皮肤过敏/皮疹": "有些不适，略显烦躁",
-            "轻微擦伤": "行动稍有不便",
-            "轻微头痛": "思维略慢，声音轻柔",
-            "落枕": "颈部不适，活动受限",
-            "脚踝扭伤": "行动不便，需要休息",
-            "鼻血": "刚止血，说话小心",
-            "口腔溃疡": "说话略有不便",
-        }
-        
-        state_hint = state_hints.get(illness_type.value, "身体欠佳，略显疲惫")
-        
-        # 极简提示词，强调保持正常交流
-        prompt = f"""[当前状态：{illness_type.value} - {state_hint}]
-重要：保持正常交流和回复质量，仅在自然的情况下适当体现身体不适感。不影响核心功能和人格。"""
-        
-        return prompt.strip()
-    
-    def _generate_kfc_prompt(self, illness_type, illness_desc: str, kfc_mode: str) -> str:
-        """生成KFC模式提示词 - 轻量化版本"""
-        # 超简化状态提示
-        kfc_states = {
-            "重感冒": "重感冒，略疲惫",
-            "轻感冒": "轻感冒，鼻塞",
-            "扁桃体炎/咽炎": "喉咙不适",
-            "肠胃不适(腹泻)": "肠胃不适",
-            "皮肤过敏/皮疹": "皮肤过敏",
-            "轻微擦伤": "小擦伤",
-            "轻微头痛": "轻微头痛",
-            "落枕": "落枕",
-            "脚踝扭伤": "脚踝扭伤",
-            "鼻血": "刚流鼻血",
-            "口腔溃疡": "口腔溃疡",
-        }
-        
-        state = kfc_states.get(illness_type.value, "身体欠佳")
-        
-        # 极简提示，强调正常交流
-        if kfc_mode == "unified":
-            prompt = f"[状态：{state}] 重要：保持正常交流能力，仅在自然时体现不适。"
-        else:
-            prompt = f"【当前状态】{state}\n【重要】保持正常交流，可适当体现不适"
-        
-        return prompt.strip()
-    
-    def _generate_afc_prompt(self, illness_type, illness_desc: str) -> str:
-        """生成AFC模式提示词 - 轻量化版本"""
-        # 简洁的状态描述
-        afc_states = {
-            "重感冒": "重感冒，略显疲惫",
-            "轻感冒": "轻感冒，鼻音略重",
-            "扁桃体炎/咽炎": "咽喉不适",
-            "肠胃不适(腹泻)": "肠胃不适，精神欠佳",
-            "皮肤过敏/皮疹": "皮肤过敏，略显烦躁",
-            "轻微擦伤": "轻微擦伤",
-            "轻微头痛": "轻微头痛",
-            "落枕": "落枕，活动受限",
-            "脚踝扭伤": "脚踝扭伤",
-            "鼻血": "刚止鼻血",
-            "口腔溃疡": "口腔溃疡",
-        }
-        
-        state = afc_states.get(illness_type.value, "身体欠佳")
-        
-        # 极简提示词，强调正常交流
-        prompt = f"""[当前状态：{state}]
-重要：保持正常交流和功能，仅在适当时自然体现身体不适。"""
-        
-        return prompt.strip()
 
 
 # ==================== 事件处理器 ====================
@@ -186,11 +286,17 @@ class IllnessStateHandler(BaseEventHandler):
         super().__init__()
         self.illness_manager = None
         self.config = None
+        self._daily_probability = 0.05
+        # 下一次允许检查的时间（time.monotonic），未到时间的事件直接跳过
+        self._next_check_ts = 0.0
+        self._check_interval = 60.0
     
-    def set_components(self, manager: IllnessManager, config: dict):
+    def set_components(self, manager: IllnessManager, config: _PluginConfig):
         """设置依赖组件"""
         self.illness_manager = manager
         self.config = config
+        self._daily_probability = config.daily_probability
+        self._check_interval = config.check_interval_seconds
     
     async def execute(self, params: dict) -> HandlerResult:
         """执行状态更新"""
@@ -198,15 +304,20 @@ class IllnessStateHandler(BaseEventHandler):
             if not self.illness_manager or not self.config:
                 return HandlerResult(success=True, continue_process=True)
             
+            now = time.monotonic()
+            if now < self._next_check_ts:
+                return HandlerResult(success=True, continue_process=True)
+            
             # 更新现有疾病状态
             self.illness_manager.update_illness_state()
             
             # 检查是否应该生病
-            daily_probability = self.config.get("daily_probability", 0.05)
-            if self.illness_manager.should_get_sick(daily_probability):
+            if self.illness_manager.should_get_sick(self._daily_probability):
                 new_illness = self.illness_manager.trigger_random_illness()
                 if new_illness:
-                    logger.info(f"触发新疾病：{new_illness.illness_type.value}")
+                    logger.info(f"触发新疾病：{new_illness.illness_type}")
+            
+            self._next_check_ts = now + self._check_interval
             
             return HandlerResult(
                 success=True,
@@ -225,6 +336,19 @@ class IllnessStateHandler(BaseEventHandler):
 
 # ==================== 命令组件 ====================
 
+# /health 命令的回复模板
+_HEALTHY_MSG = "✅ 麦麦目前非常健康，精力充沛！"
+_COOL_DOWN_MSG = "✅ 麦麦目前很健康！\n\n刚刚康复不久，正在休息恢复中，还有{r}的恢复期。"
+_SICK_MSG = "🤒 麦麦目前生病了\n\n**疾病类型**: {t}\n**症状描述**: {d}\n**恢复时间**: {r}\n\n请对麦麦温柔一些哦～"
+
+# 命令的固定返回值
+_NOT_INIT_RESULT = (False, "系统未初始化", True)
+_HEALTH_OK_RESULT = (True, "健康状态查询成功", True)
+_RECOVERY_OK_RESULT = (True, "强制康复成功", True)
+_FORCE_SICK_OK_RESULT = (True, "强制生病成功", True)
+_FORCE_SICK_FAIL_RESULT = (False, "触发疾病失败", True)
+
+
 class HealthCheckCommand(PlusCommand):
     """检查健康状态的命令"""
     
@@ -241,45 +365,31 @@ class HealthCheckCommand(PlusCommand):
         cls._illness_manager = manager
     
     async def execute(self, args: CommandArgs) -> Tuple[bool, Optional[str], bool]:
-        if not self.__class__._illness_manager:
+        illness_manager = self.__class__._illness_manager
+        if not illness_manager:
             await self.send_text("健康系统未初始化")
-            return False, "系统未初始化", True
+            return _NOT_INIT_RESULT
         
-        status = self.__class__._illness_manager.get_health_status()
+        status = illness_manager.get_health_status()
         
         if status["is_healthy"]:
             if status["in_cool_down"]:
                 remaining_hours = status["cool_down_remaining"]
-                if remaining_hours > 24:
-                    days = remaining_hours / 24
-                    message = f"✅ 麦麦目前很健康！\n\n刚刚康复不久，正在休息恢复中，还有{days:.1f}天的恢复期。"
-                else:
-                    message = f"✅ 麦麦目前很健康！\n\n刚刚康复不久，正在休息恢复中，还有{remaining_hours:.1f}小时的恢复期。"
+                remaining = f"{remaining_hours / 24:.1f}天" if remaining_hours > 24 else f"{remaining_hours:.1f}小时"
+                message = _COOL_DOWN_MSG.format(r=remaining)
             else:
-                message = "✅ 麦麦目前非常健康，精力充沛！"
+                message = _HEALTHY_MSG
         else:
             illness_info = status["current_illness"]
-            illness_type = illness_info["type"]
-            description = illness_info["description"]
-            
-            if "recovery_remaining_hours" in status:
-                remaining = status["recovery_remaining_hours"]
-                if remaining > 24:
-                    days = remaining / 24
-                    recovery_time = f"预计还有{days:.1f}天康复"
-                else:
-                    recovery_time = f"预计还有{remaining:.1f}小时康复"
-            else:
-                recovery_time = "突发性症状，很快就会恢复"
-            
-            message = f"🤒 麦麦目前生病了\n\n" \
-                     f"**疾病类型**: {illness_type}\n" \
-                     f"**症状描述**: {description}\n" \
-                     f"**恢复时间**: {recovery_time}\n\n" \
-                     f"请对麦麦温柔一些哦～"
+            remaining = status.get("recovery_remaining_hours")
+            recovery_time = (
+                (f"预计还有{remaining / 24:.1f}天康复" if remaining > 24 else f"预计还有{remaining:.1f}小时康复")
+                if remaining is not None else "突发性症状，很快就会恢复"
+            )
+            message = _SICK_MSG.format(t=illness_info["type"], d=illness_info["description"], r=recovery_time)
         
         await self.send_text(message)
-        return True, "健康状态查询成功", True
+        return _HEALTH_OK_RESULT
 
 
 class ForceRecoveryCommand(PlusCommand):
@@ -292,26 +402,31 @@ class ForceRecoveryCommand(PlusCommand):
     
     # 类级别的疾病管理器引用
     _illness_manager = None
+    # 类级别的插件配置快照，由插件加载配置后设置
+    _config = _PluginConfig()
     
     @classmethod
     def set_illness_manager(cls, manager: IllnessManager):
         cls._illness_manager = manager
     
+    @classmethod
+    def set_config(cls, config: _PluginConfig):
+        cls._config = config
+    
     async def execute(self, args: CommandArgs) -> Tuple[bool, Optional[str], bool]:
-        if not self.__class__._illness_manager:
+        illness_manager = self.__class__._illness_manager
+        if not illness_manager:
             await self.send_text("健康系统未初始化")
-            return False, "系统未初始化", True
+            return _NOT_INIT_RESULT
         
         # 检查是否是Master（这里需要权限系统，先简化处理）
         # 在实际应用中应该使用权限装饰器 @require_master
         
-        cool_down_days = self.get_config("recovery.cool_down_days", 3.0)
-        
-        self.__class__._illness_manager.force_recovery()
-        self.__class__._illness_manager.set_cool_down(cool_down_days)
+        illness_manager.force_recovery()
+        illness_manager.set_cool_down(self.__class__._config.cool_down_days)
         
         await self.send_text("✅ 已强制麦麦恢复健康，并开始休息恢复期。")
-        return True, "强制康复成功", True
+        return _RECOVERY_OK_RESULT
 
 
 class ForceSickCommand(PlusCommand):
@@ -330,24 +445,25 @@ class ForceSickCommand(PlusCommand):
         cls._illness_manager = manager
     
     async def execute(self, args: CommandArgs) -> Tuple[bool, Optional[str], bool]:
-        if not self.__class__._illness_manager:
+        illness_manager = self.__class__._illness_manager
+        if not illness_manager:
             await self.send_text("健康系统未初始化")
-            return False, "系统未初始化", True
+            return _NOT_INIT_RESULT
         
         # 检查是否是Master（这里需要权限系统，先简化处理）
         # 在实际应用中应该使用权限装饰器 @require_master
         
         # 触发随机疾病
-        new_illness = self.__class__._illness_manager.trigger_random_illness()
+        new_illness = illness_manager.trigger_random_illness()
         
         if new_illness:
             illness_type = new_illness.illness_type.value
-            description = self.__class__._illness_manager.get_current_illness_description()
+            description = illness_manager.get_current_illness_description()
             await self.send_text(f"✅ 已强制麦麦生病\n\n**疾病类型**: {illness_type}\n**症状描述**: {description}\n\n请对麦麦温柔一些哦～")
-            return True, "强制生病成功", True
+            return _FORCE_SICK_OK_RESULT
         else:
             await self.send_text("❌ 触发疾病失败，请检查日志")
-            return False, "触发疾病失败", True
+            return _FORCE_SICK_FAIL_RESULT
 
 
 # ==================== 主插件类 ====================
@@ -386,6 +502,12 @@ class IllnessPlugin(BasePlugin):
                 description="每天生病的概率（0-1之间的小数），例如0.05表示5%的概率",
                 example="0.05"
             ),
+            "check_interval_seconds": ConfigField(
+                type=float,
+                default=60.0,
+                description="两次检查疾病状态（阶段变化、是否生病）之间的最短间隔（秒）",
+                example="60.0"
+            ),
         },
         "recovery": {
             "cool_down_days": ConfigField(
@@ -447,39 +569,56 @@ class IllnessPlugin(BasePlugin):
         self.illness_manager = None
         self.illness_prompt = None
         self.state_handler = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._atexit_registered = False
+        self._config: Optional[_PluginConfig] = None
+    
+    def _load_config(self) -> _PluginConfig:
+        """一次性读取插件的所有配置项"""
+        return _PluginConfig(
+            enable_plugin=self.get_config("general.enable_plugin", True),
+            daily_probability=self.get_config("probability.daily_probability", 0.05),
+            check_interval_seconds=self.get_config("probability.check_interval_seconds", 60.0),
+            cool_down_days=self.get_config("recovery.cool_down_days", 3.0),
+            kfc_enabled=self.get_config("kfc_integration.enabled", True),
+            # 除 unified 以外的取值都按 split 处理
+            kfc_mode="unified" if self.get_config("kfc_integration.mode", "unified") == "unified" else "split",
+            enable_health_check=self.get_config("features.enable_health_check", True),
+            enable_force_recovery=self.get_config("features.enable_force_recovery", True),
+            enable_force_sick=self.get_config("features.enable_force_sick", True),
+        )
         
     def initialize_components(self):
-        """初始化组件依赖"""
-        # 检查插件是否启用
-        if not self.get_config("general.enable_plugin", True):
-            logger.info("生小病插件已被禁用")
-            return
+        """初始化组件依赖（由 get_plugin_components 在确认插件启用后调用）"""
+        if self._config is None:
+            self._config = self._load_config()
         
         # 获取本地存储
         storage = storage_api.get_local_storage(self.plugin_name)
         
+        # 重新初始化时先写入旧管理器未保存的改动，避免与新管理器的状态互相覆盖
+        if self.illness_manager:
+            self.illness_manager.flush()
+        
         # 初始化疾病管理器
         self.illness_manager = IllnessManager(storage)
         
         # 更新疾病状态（考虑离线时间）
         self.illness_manager.update_illness_state()
         
-        # 获取配置
-        config = {
-            "daily_probability": self.get_config("probability.daily_probability", 0.05),
-            "cool_down_days": self.get_config("recovery.cool_down_days", 3.0),
-            "enable_auto_recovery": self.get_config("recovery.enable_auto_recovery", True),
-            "verbose_logging": self.get_config("features.verbose_logging", False),
-            "kfc_enabled": self.get_config("kfc_integration.enabled", True),
-            "kfc_mode": self.get_config("kfc_integration.mode", "unified"),
-            "kfc_priority": self.get_config("kfc_integration.priority", 100)
-        }
+        # 疾病阶段变化采用写回模式，进程退出时写入当前管理器未保存的改动（只注册一次）
+        if not self._atexit_registered:
+            atexit.register(self._flush_state)
+            self._atexit_registered = True
         
         # 初始化事件处理器
         self.state_handler = IllnessStateHandler()
-        self.state_handler.set_components(self.illness_manager, config)
+        self.state_handler.set_components(self.illness_manager, self._config)
         
-        # 设置命令组件的疾病管理器
+        # 设置Prompt组件和命令组件的疾病管理器及配置快照
+        IllnessPrompt.set_config(self._config)
+        ForceRecoveryCommand.set_config(self._config)
+        IllnessPrompt.set_illness_manager(self.illness_manager)
         HealthCheckCommand.set_illness_manager(self.illness_manager)
         ForceRecoveryCommand.set_illness_manager(self.illness_manager)
         ForceSickCommand.set_illness_manager(self.illness_manager)
@@ -491,8 +630,10 @@ class IllnessPlugin(BasePlugin):
     
     def get_plugin_components(self) -> List[Tuple[ComponentInfo, Type]]:
         """注册插件的所有功能组件"""
+        self._config = self._load_config()
+        
         # 检查插件是否启用
-        if not self.get_config("general.enable_plugin", True):
+        if not self._config.enable_plugin:
             logger.info("生小病插件已被禁用，不注册任何组件")
             return []
         
@@ -515,19 +656,19 @@ class IllnessPlugin(BasePlugin):
             ))
         
         # 根据配置注册命令
-        if self.get_config("features.enable_health_check", True):
+        if self._config.enable_health_check:
             components.append((
                 HealthCheckCommand.get_plus_command_info(),
                 HealthCheckCommand
             ))
         
-        if self.get_config("features.enable_force_recovery", True):
+        if self._config.enable_force_recovery:
             components.append((
                 ForceRecoveryCommand.get_plus_command_info(),
                 ForceRecoveryCommand
             ))
         
-        if self.get_config("features.enable_force_sick", True):
+        if self._config.enable_force_sick:
             components.append((
                 ForceSickCommand.get_plus_command_info(),
                 ForceSickCommand
@@ -535,19 +676,47 @@ class IllnessPlugin(BasePlugin):
         
         return components
     
+    def _flush_state(self):
+        """将当前疾病管理器未保存的改动写入存储"""
+        if not self.illness_manager:
+            return
+        try:
+            self.illness_manager.flush()
+        except Exception as e:
+            logger.error(f"写入疾病状态失败：{e}")
+    
+    async def _flush_loop(self):
+        """定期将疾病状态的改动写回存储，任务被取消时再写入一次"""
+        try:
+            while True:
+                await asyncio.sleep(STATE_FLUSH_INTERVAL)
+                self._flush_state()
+        finally:
+            self._flush_state()
+    
+    async def on_unload(self):
+        """插件卸载时的钩子：停止定期写回并写入未保存的改动"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._flush_state()
+    
     async def on_plugin_loaded(self):
         """插件加载完成后的钩子"""
-        logger.info(f"生小病插件加载完成！当前健康状态：")
+        if self.illness_manager and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        logger.info("生小病插件加载完成！当前健康状态：")
         
         status = self.illness_manager.get_health_status()
         if status["is_healthy"]:
             if status["in_cool_down"]:
-                logger.info(f"  状态：健康（恢复期中）")
-                logger.info(f"  剩余恢复时间：{status['cool_down_remaining']:.1f}小时")
+                logger.info("  状态：健康（恢复期中）")
+                logger.info("  剩余恢复时间：%.1f小时", status['cool_down_remaining'])
             else:
-                logger.info(f"  状态：完全健康")
+                logger.info("  状态：完全健康")
         else:
             illness_info = status["current_illness"]
-            logger.info(f"  状态：生病中")
-            logger.info(f"  疾病类型：{illness_info['type']}")
-            logger.info(f"  发病时间：{time.strftime('%Y-%m-%d %H:%M', time.localtime(illness_info['start_time']))}")
\ No newline at end of file
+            logger.info("  状态：生病中")
+            logger.info("  疾病类型：%s", illness_info['type'])
+            logger.info("  发病时间：%s", time.strftime('%Y-%m-%d %H:%M', time.localtime(illness_info['start_time'])))
\ No newline at end of file